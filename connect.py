@@ -1,23 +1,80 @@
 import os
+import json
+import asyncio
 import datetime as dt
+import functools
+import tempfile
 from enum import Enum
-from typing import Union, Optional
+from typing import Callable, Union, Optional
 
+import aiohttp
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import jwt
+from cryptography.hazmat.primitives import serialization
+import numpy as np
 import pandas as pd
 from rich.console import Console
 
 from util import read_json
 
-# Load env variables
-from dotenv import load_dotenv
+# orjson parses the (often multi megabyte) report responses much faster
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
-load_dotenv()
+# Load env variables from .env, set ADOBE_SKIP_DOTENV=1 when they are already set
+if os.getenv("ADOBE_SKIP_DOTENV") != "1":
+    from dotenv import load_dotenv
+
+    load_dotenv(override=False)
 
 
 BASE_URL = "https://analytics.adobe.io/"
 JWT_URL = "https://ims-na1.adobelogin.com/ims/exchange/jwt"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 5
+BACKOFF_FACTOR = 0.5
+ASYNC_TIMEOUT = aiohttp.ClientTimeout(total=300, connect=30)
+# a cached token is only reused if it has more than this many seconds left
+TOKEN_REFRESH_BUFFER = 300
+
+
+@functools.lru_cache(maxsize=1)
+def _load_private_key(private_key_path: str):
+    """reads and parses the PEM private key once, reused for every jwt we sign"""
+    with open(private_key_path, "rb") as f:
+        return serialization.load_pem_private_key(f.read(), password=None)
+
+
+@functools.lru_cache(maxsize=1)
+def _jwt_template() -> dict:
+    """the static jwt claims, only the exp claim changes between tokens"""
+    return {
+        "iss": os.environ["ORG_ID"],
+        "sub": os.environ["TECH_ID"],
+        "https://ims-na1.adobelogin.com/s/ent_analytics_bulk_ingest_sdk": True,
+        "aud": f"https://ims-na1.adobelogin.com/c/{os.environ['CLIENT_ID']}",
+    }
+
+
+def _run_sync(coro, async_hint: str):
+    """
+    runs a coroutine from sync code
+    asyncio.run can't be used inside a running event loop (e.g. jupyter),
+    so raise a clear error pointing at the async alternative instead
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    coro.close()
+    raise RuntimeError(
+        f"this can't run inside an already running event loop (e.g. jupyter), "
+        f"{async_hint}"
+    )
 
 
 class RequestType(Enum):
@@ -26,11 +83,14 @@ class RequestType(Enum):
 
 
 class AdobeAnalytics:
+    _VERB_TABLE = {RequestType.GET: "get", RequestType.POST: "post"}
+
     def __init__(
         self,
         rsid: str = None,
         console: Optional[Console] = None,
         private_key_path: str = "./adobe-credentials/keys/preivate.key",
+        token_cache_path: str = "./adobe-credentials/.token_cache.json",
     ) -> None:
         """on init, will get access token using a jwt payload"""
         self.RSID = rsid
@@ -40,33 +100,137 @@ class AdobeAnalytics:
             self.console = Console()
 
         self.private_key_path = private_key_path
+        self.token_cache_path = token_cache_path
+        # (rsid, endpoint, limit, page) -> response for slow changing metadata
+        self._meta_cache = {}
+        self._session = self._make_session_()
         self.ACCESS_TOKEN = self._get_access_token_()
-        self.BASE_REPORTING_URL = self._get_global_id_()
+        self.GLOBAL_CO_ID = None
+        self._build_headers_()
+        try:
+            self.BASE_REPORTING_URL = self._get_global_id_()
+        except requests.HTTPError as e:
+            # a cached token may have been revoked, get a fresh one and retry once
+            if not self._token_from_cache or e.response.status_code != 401:
+                raise
+            self.refresh_access_token()
+            self.BASE_REPORTING_URL = self._get_global_id_()
+        # now that we have the global company id, bake it into the base header
+        self._build_headers_()
+
+    @property
+    def RSID(self) -> str:
+        return self._rsid
+
+    @RSID.setter
+    def RSID(self, rsid: str) -> None:
+        """sets the report suite and the query string suffixes that carry it"""
+        self._rsid = rsid
+        # query string suffixes for endpoints without/with existing params
+        self._rsid_q = f"?rsid={rsid}"
+        self._rsid_a = f"&rsid={rsid}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _make_session_(self) -> requests.Session:
+        """pooled session so every call reuses the same keep-alive connections"""
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(
+                total=MAX_RETRIES,
+                backoff_factor=BACKOFF_FACTOR,
+                status_forcelist=sorted(RETRY_STATUSES),
+                allowed_methods=["GET", "POST"],
+                respect_retry_after_header=True,
+                # hand back the last response so raise_for_status can report it
+                raise_on_status=False,
+            ),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"Connection": "keep-alive"})
+        return session
 
-    def _get_jwt_token(self, expiration_date: dt.datetime):
+    def close(self):
+        """closes the underlying http session"""
+        self._session.close()
+
+    def _get_jwt_token(self, expiration_date: int):
         # CREATE JWT PAYLOAD
         # https://github.com/AdobeDocs/adobeio-auth/blob/stage/JWT/JWT.md#required-claims-for-a-service-account-jwt
-        jwt_payload = {
-            "exp": int((dt.datetime.now() + dt.timedelta(days=1)).timestamp()),
-            "iss": os.environ["ORG_ID"],
-            "sub": os.environ["TECH_ID"],
-            "https://ims-na1.adobelogin.com/s/ent_analytics_bulk_ingest_sdk": True,
-            "aud": f"https://ims-na1.adobelogin.com/c/{os.environ['CLIENT_ID']}",
-        }
-        # read in our private key
-        with open(self.private_key_path, "r") as f:
-            PRIVATE_KEY = f.read()
-        # ENCODE JWT
-        return jwt.encode(jwt_payload, PRIVATE_KEY, algorithm="RS256")
+        jwt_payload = {**_jwt_template(), "exp": expiration_date}
+        # ENCODE JWT (with the already parsed private key)
+        return jwt.encode(
+            jwt_payload, _load_private_key(self.private_key_path), algorithm="RS256"
+        )
 
-    def _get_access_token_(self, expiration_date: dt.datetime = None):
+    def _read_token_cache_(self) -> Optional[str]:
+        """returns the cached access token if it is not close to expiring"""
+        try:
+            with open(self.token_cache_path, "r") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cache, dict):
+            return None
+        # ignore tokens issued for different credentials
+        if cache.get("client_id") != os.environ["CLIENT_ID"]:
+            return None
+        exp = cache.get("exp")
+        # a corrupt or hand edited exp is treated as a cache miss
+        if not isinstance(exp, (int, float)):
+            return None
+        if exp - dt.datetime.now().timestamp() > TOKEN_REFRESH_BUFFER:
+            return cache.get("access_token")
+
+    def _write_token_cache_(self, access_token: str, exp: int) -> None:
+        """
+        atomically writes the token cache, readable only by the current user
+        caching is skipped if the cache location isn't writable
+        """
+        cache_dir = os.path.dirname(self.token_cache_path) or "."
+        tmp_path = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # mkstemp creates the file with 0600 and a unique name per process
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+            with os.fdopen(fd, "w") as f:
+                json.dump(
+                    {
+                        "access_token": access_token,
+                        "exp": exp,
+                        "client_id": os.environ["CLIENT_ID"],
+                    },
+                    f,
+                )
+            os.replace(tmp_path, self.token_cache_path)
+        except OSError:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _get_access_token_(
+        self, expiration_date: dt.datetime = None, use_cache: bool = True
+    ):
         """Returns the access token required for auth with adobe apis"""
+        # reuse the cached token until it is about to expire
+        self._token_from_cache = False
+        if use_cache:
+            cached_token = self._read_token_cache_()
+            if cached_token:
+                self._token_from_cache = True
+                return cached_token
+
+        now = dt.datetime.now()
         # if no expiration date (set one for 1 day in the future)
         # if there is one, convert it to a timestamp
         if expiration_date is None:
-            expiration_date = int(
-                (dt.datetime.now() + dt.timedelta(days=1)).timestamp()
-            )
+            expiration_date = int((now + dt.timedelta(days=1)).timestamp())
         else:
             expiration_date = int(expiration_date.timestamp())
 
@@ -79,10 +243,23 @@ class AdobeAnalytics:
             "jwt_token": jwt,
         }
         # MAKE THE REQUEST
-        access_token_response = requests.post(JWT_URL, data=access_payload)
-        # if we get 200, return the access token,
-        if access_token_response.status_code == 200:
-            return access_token_response.json()["access_token"]
+        access_token_response = self._session.post(JWT_URL, data=access_payload)
+        # fail loudly instead of carrying on with no token
+        access_token_response.raise_for_status()
+        token_details = json_loads(access_token_response.content)
+        # expires_in is returned in milliseconds
+        if "expires_in" in token_details:
+            exp = int(now.timestamp() + token_details["expires_in"] / 1000)
+        else:
+            exp = expiration_date
+        self._write_token_cache_(token_details["access_token"], exp)
+        return token_details["access_token"]
+
+    def refresh_access_token(self) -> str:
+        """forces a new access token, ignoring (and replacing) the cached one"""
+        self.ACCESS_TOKEN = self._get_access_token_(use_cache=False)
+        self._build_headers_()
+        return self.ACCESS_TOKEN
 
     def _get_global_id_(self):
         self.global_details = self.make_request(
@@ -105,37 +282,44 @@ class AdobeAnalytics:
             self.console.log(
                 f"Pulling API from workspace JSON for {len(metric_count) if metric_count else None } metrics",
             )
-        response = requests.post(
+        response = self._session.post(
             url=f"{self.BASE_REPORTING_URL}reports",
             headers=self.make_header(),
             json=workspace_json,
         )
-        if response.ok:
-            return response.json()
+        response.raise_for_status()
+        return json_loads(response.content)
 
-    def make_header(self, additional_header: dict = None, global_id: bool = False):
-        """Adds values to the base header if passed in"""
-        base_header = {
+    def _build_headers_(self) -> None:
+        """precomputes the headers so make_header doesn't rebuild them per request"""
+        self._bootstrap_header = {
             "Accept": "application/json",
+            # report json compresses well, brotli is decoded when installed
+            "Accept-Encoding": "gzip, br, deflate",
             "Authorization": f"Bearer {self.ACCESS_TOKEN}",
             "x-api-key": os.environ["CLIENT_ID"],
         }
+        self._base_header = {
+            **self._bootstrap_header,
+            "x-proxy-global-company-id": self.GLOBAL_CO_ID,
+        }
+
+    def make_header(self, additional_header: dict = None, global_id: bool = False):
+        """Adds values to the base header if passed in"""
         # if we are looking for the global id, this is all we need
         if global_id:
-            return base_header
-        # if not, we will need to add the global company id in
-        base_header.update({"x-proxy-global-company-id": self.GLOBAL_CO_ID})
+            return self._bootstrap_header
         # then we can add any additional items we may want
         if isinstance(additional_header, dict):
-            base_header.update(additional_header)
-        return base_header
+            return {**self._base_header, **additional_header}
+        return self._base_header
 
     def make_request(
         self,
         endpoint: str,
         url: str = None,
         request_header: dict = None,
-        request_type: RequestType = "GET",
+        request_type: Union[RequestType, str] = RequestType.GET,
         post_body: dict = None,
     ):
         """Accepts an endpoint, makes the request, returns the json response"""
@@ -145,27 +329,23 @@ class AdobeAnalytics:
         if url is None:
             url = self.BASE_REPORTING_URL
         # Add in the RSID
-        if "?" in endpoint:
-            endpoint += f"&rsid={self.RSID}"
-        else:
-            endpoint += f"?rsid={self.RSID}"
-
-        if request_type == "GET":
-            self.console.log(f"Pulling: {url+endpoint}")
-            response = requests.get(
-                url + endpoint,
-                headers=request_header,
-            )
-            self.recent_response = response
-
-        elif request_type == "POST" and post_body:
-            self.console.log(f"Posting: {url+endpoint}")
-            response = requests.post(
-                url + endpoint, headers=request_header, json=post_body
-            )
-            self.recent_response = response
+        endpoint += self._rsid_a if "?" in endpoint else self._rsid_q
+
+        # accept "GET"/"POST" strings as well as the enum
+        if isinstance(request_type, str):
+            request_type = RequestType[request_type.upper()]
+        is_post = request_type is RequestType.POST
+
+        self.console.log(f"{'Posting' if is_post else 'Pulling'}: {url+endpoint}")
+        response = getattr(self._session, self._VERB_TABLE[request_type])(
+            url + endpoint,
+            headers=request_header,
+            json=post_body if is_post else None,
+        )
+        self.recent_response = response
 
-        return response.json()
+        response.raise_for_status()
+        return json_loads(response.content)
 
     def set_date_range(
         self,
@@ -178,6 +358,8 @@ class AdobeAnalytics:
         """
         self.start_date = start
         self.end_date = end
+        # format once here, every report body reuses it
+        self._formatted_range = f"{start.strftime('%Y-%m-%d')}T00:00:00.000/{end.strftime('%Y-%m-%d')}T00:00:00.000"
         return self.__format_date_range__()
 
     def __format_date_range__(self):
@@ -186,31 +368,114 @@ class AdobeAnalytics:
         start_dateT00:00:00/end_dateT00:00:00
         setting each day to midnight
         """
-        return f"{self.start_date.strftime('%Y-%m-%d')}T00:00:00.000/{self.end_date.strftime('%Y-%m-%d')}T00:00:00.000"
+        return self._formatted_range
+
+    def _paged_endpoint(self, endpoint: str, limit: int, page: int) -> str:
+        """adds the limit and page query params to an endpoint"""
+        separator = "&" if "?" in endpoint else "?"
+        return f"{endpoint}{separator}limit={limit}&page={page}"
+
+    async def _aget_pages(
+        self, endpoint: str, pages: range, page_size: int, max_parallel: int
+    ) -> list:
+        """pulls the given pages of an endpoint concurrently, in page order"""
+        semaphore = asyncio.Semaphore(max_parallel)
+
+        async def get_page(session, page):
+            async with semaphore:
+                return await self._aget(
+                    session, self._paged_endpoint(endpoint, page_size, page)
+                )
 
-    def get_report_suite_id(self, limit: int = 10, page: int = 0):
-        endpoint = f"/collections/suites?limit={limit}&page={page}"
-        self.reporting_suites = self.make_request(endpoint)
+        async with self._make_async_session(max_parallel) as session:
+            return await asyncio.gather(*[get_page(session, page) for page in pages])
+
+    def iter_all(self, endpoint: str, page_size: int = 1000, max_parallel: int = 10):
+        """
+        yields every item of a paginated endpoint
+        page 0 is pulled first to find totalPages, the rest are pulled concurrently
+        endpoints that are not paginated (return a plain list) are yielded as is
+        needs asyncio.run for pages past the first, so not usable in jupyter
+        """
+        first_page = self.make_request(self._paged_endpoint(endpoint, page_size, 0))
+        if isinstance(first_page, list):
+            yield from first_page
+            return
+        yield from first_page.get("content", [])
+        if first_page.get("lastPage", True):
+            return
+        remaining = range(1, first_page.get("totalPages", 1))
+        for page in _run_sync(
+            self._aget_pages(endpoint, remaining, page_size, max_parallel),
+            "pull pages one at a time with page=... instead of all_pages=True",
+        ):
+            yield from page.get("content", [])
+
+    def _cached_metadata(self, key: tuple, fetch: Callable):
+        """
+        returns the cached result for key, calling fetch() on a miss
+        metadata differs per report suite, so the current RSID is part of the key
+        a failed fetch raises before anything is cached
+        """
+        key = (self.RSID, *key)
+        if key not in self._meta_cache:
+            self._meta_cache[key] = fetch()
+        return self._meta_cache[key]
 
-    def get_segments(self, limit: int = 10, page: int = 0):
-        return self.make_request(f"segments?limit={limit}")
+    def invalidate_metadata_cache(self) -> None:
+        """clears the cached segments, dimensions, metrics and report suites"""
+        self._meta_cache.clear()
+
+    def get_report_suite_id(
+        self, limit: int = 10, page: int = 0, all_pages: bool = False
+    ):
+        if all_pages:
+            self.reporting_suites = self._cached_metadata(
+                ("collections/suites", limit, "all"),
+                lambda: list(self.iter_all("collections/suites", page_size=limit)),
+            )
+        else:
+            endpoint = f"/collections/suites?limit={limit}&page={page}"
+            self.reporting_suites = self._cached_metadata(
+                ("collections/suites", limit, page),
+                lambda: self.make_request(endpoint),
+            )
+
+    def get_segments(self, limit: int = 10, page: int = 0, all_pages: bool = False):
+        if all_pages:
+            return self._cached_metadata(
+                ("segments", limit, "all"),
+                lambda: list(self.iter_all("segments", page_size=limit)),
+            )
+        return self._cached_metadata(
+            ("segments", limit, page),
+            lambda: self.make_request(f"segments?limit={limit}&page={page}"),
+        )
 
     def get_dimensions(self, limit: int = 10):
-        return self.make_request(f"dimensions?limit={limit}")
+        return self._cached_metadata(
+            ("dimensions", limit, 0),
+            lambda: self.make_request(f"dimensions?limit={limit}"),
+        )
 
     def get_metrics(self, limit: int = 10):
-        return self.make_request(f"metrics?limit={limit}")
+        return self._cached_metadata(
+            ("metrics", limit, 0),
+            lambda: self.make_request(f"metrics?limit={limit}"),
+        )
 
-    def get_projects(self, limit: int = 10, page: int = 0):
+    def get_projects(self, limit: int = 10, page: int = 0, all_pages: bool = False):
+        if all_pages:
+            return list(self.iter_all("project", page_size=limit))
         endpoint = f"project?&limit={limit}&page={page}"
         return self.make_request(endpoint)
 
-    def get_report(self, metrics_list, dimension, segment_id):
+    def _make_report_body(self, metrics_list, dimension, segment_id) -> dict:
         """
         Makes the report body for a request
         You must have already called self.set_date_range()
         """
-        report_body = {
+        return {
             "rsid": self.RSID,
             "globalFilters": [
                 {
@@ -230,17 +495,156 @@ class AdobeAnalytics:
                 "limit": 50000,
             },
         }
-        return self.make_request("reports", request_type="POST", post_body=report_body)
 
-    def _get_metric_names(self, json_body: dict) -> list:
-        """retuns a list of metric names"""
+    def get_report(self, metrics_list, dimension, segment_id):
+        """
+        Makes the report body and pulls the report
+        You must have already called self.set_date_range()
+        """
+        report_body = self._make_report_body(metrics_list, dimension, segment_id)
+        # keep the column names around for _parse_output
+        self.metric_names = self._get_metric_names(report_body)
+        return self.make_request(
+            "reports", request_type=RequestType.POST, post_body=report_body
+        )
+
+    def get_reports_batch(self, report_requests: list, max_parallel: int = 16) -> list:
+        """
+        Pulls many reports at once
+        report_requests is a list of (metrics_list, dimension, segment_id) tuples
+        returns (metric_names, response) pairs in the same order as report_requests
+        so each response can be handed straight to _parse_output
+        not usable inside a running event loop (jupyter), see get_reports_bulk
+        You must have already called self.set_date_range()
+        """
+        report_bodies = [
+            self._make_report_body(metrics_list, dimension, segment_id)
+            for metrics_list, dimension, segment_id in report_requests
+        ]
+        responses = self.get_reports_bulk(report_bodies, max_parallel)
         return [
-            x["id"].split("/")[1] if "/" in x["id"] else f"{idx}-{x['id']}"
-            for idx, x in enumerate(json_body["metricContainer"]["metrics"])
+            (self._get_metric_names(body), response)
+            for body, response in zip(report_bodies, responses)
         ]
 
-    def _parse_output(self, report_response: dict) -> pd.DataFrame:
-        pass
+    async def _arequest(
+        self,
+        session: aiohttp.ClientSession,
+        method: str,
+        url: str,
+        headers: dict,
+        post_body: dict = None,
+        max_retries: int = MAX_RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+    ):
+        """
+        makes an async request, retrying on 429/5xx, connection errors and
+        timeouts with exponential backoff
+        """
+        for attempt in range(max_retries + 1):
+            retry_after = None
+            try:
+                async with session.request(
+                    method, url, headers=headers, json=post_body
+                ) as response:
+                    if response.status not in RETRY_STATUSES or attempt == max_retries:
+                        response.raise_for_status()
+                        return json_loads(await response.read())
+                    # honor the server's Retry-After if it sends one
+                    retry_after = response.headers.get("Retry-After")
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == max_retries:
+                    raise
+            if retry_after and retry_after.isdigit():
+                delay = int(retry_after)
+            else:
+                delay = backoff_factor * (2**attempt)
+            await asyncio.sleep(delay)
+
+    def _make_async_session(self, max_parallel: int) -> aiohttp.ClientSession:
+        """pooled aiohttp session for the concurrent request helpers"""
+        connector = aiohttp.TCPConnector(limit=max_parallel, keepalive_timeout=30)
+        return aiohttp.ClientSession(connector=connector, timeout=ASYNC_TIMEOUT)
+
+    async def _aget(
+        self,
+        session: aiohttp.ClientSession,
+        endpoint: str,
+        url: str = None,
+        headers: dict = None,
+    ):
+        """async version of a GET through make_request"""
+        if headers is None:
+            headers = self.make_header()
+        if url is None:
+            url = self.BASE_REPORTING_URL
+        endpoint += self._rsid_a if "?" in endpoint else self._rsid_q
+        self.console.log(f"Pulling: {url+endpoint}")
+        return await self._arequest(session, "GET", url + endpoint, headers)
+
+    async def aget_reports(self, report_bodies: list, max_parallel: int = 20) -> list:
+        """
+        posts every report body concurrently (at most max_parallel at a time)
+        returns the json responses in the same order as report_bodies
+        """
+        semaphore = asyncio.Semaphore(max_parallel)
+        url = f"{self.BASE_REPORTING_URL}reports{self._rsid_q}"
+        headers = self.make_header()
+
+        async def post_report(session, report_body):
+            async with semaphore:
+                self.console.log(f"Posting: {url}")
+                return await self._arequest(
+                    session, "POST", url, headers, post_body=report_body
+                )
+
+        async with self._make_async_session(max_parallel) as session:
+            return await asyncio.gather(
+                *[post_report(session, body) for body in report_bodies]
+            )
+
+    def get_reports_bulk(self, report_bodies: list, max_parallel: int = 20) -> list:
+        """
+        sync wrapper around aget_reports
+        not usable inside a running event loop (jupyter), use
+        `await aa.aget_reports(...)` there instead
+        """
+        return _run_sync(
+            self.aget_reports(report_bodies, max_parallel),
+            "use `await aa.aget_reports(report_bodies)` instead",
+        )
+
+    def _get_metric_names(self, json_body: dict) -> list:
+        """retuns a list of metric names"""
+        ids = pd.Series(
+            [x["id"] for x in json_body["metricContainer"]["metrics"]], dtype=object
+        )
+        # metrics/pageviews -> pageviews, calculated metrics -> {idx}-{id}
+        indexed_ids = ids.index.astype(str) + "-" + ids
+        has_slash = ids.str.contains("/", regex=False)
+        return ids.str.split("/").str[1].where(has_slash, indexed_ids).tolist()
+
+    def _parse_output(self, report_response: dict, metric_names: list) -> pd.DataFrame:
+        """
+        turns a report response into a dataframe
+        one column per metric plus the dimension value and its itemId
+        metric_names must come from the request that produced report_response
+        (self.metric_names after get_report, or the pairs from get_reports_batch)
+        """
+        rows = report_response["rows"]
+        row_widths = {len(r["data"]) for r in rows}
+        if row_widths - {len(metric_names)}:
+            raise ValueError(
+                f"got {len(metric_names)} metric names but report rows have "
+                f"{sorted(row_widths)} values, metric_names don't match this report"
+            )
+        values = np.array([r["data"] for r in rows], dtype=float).reshape(
+            len(rows), len(metric_names)
+        )
+        return pd.DataFrame(values, columns=metric_names).assign(
+            dimension=[r["value"] for r in rows],
+            itemId=[r["itemId"] for r in rows],
+        )
 
 
 if __name__ == "__main__":